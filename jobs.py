@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import signal
+import uuid
+import asyncio
+from collections import deque
+
+
+class Job:
+    def __init__(self, kind, args, max_log_lines=1000):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.args = list(args)
+        self.status = "queued"   # queued -> running -> done / failed / cancelled
+        self.returncode = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # храним хвост лога; lines_total нужен, чтобы клиент мог запрашивать "с offset"
+        self.log = deque(maxlen=max_log_lines)
+        self.lines_total = 0
+        self.process = None
+        self.task = None
+        self.completed = False  # _run завершился и процесс точно остановлен
+        self.updated = asyncio.Event()
+
+    @property
+    def finished(self):
+        # Статус "cancelled" ставится сразу при отмене, но пока группа процессов
+        # не завершилась, задача считается активной (она еще может писать файлы)
+        return self.completed
+
+    def add_line(self, line):
+        self.log.append(line)
+        self.lines_total += 1
+        self._notify()
+
+    def lines_since(self, offset):
+        """Строки лога начиная с номера offset (если они еще в хвосте)."""
+        first = self.lines_total - len(self.log)
+        start = max(offset, first) - first
+        return list(self.log)[start:]
+
+    def _notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    def to_dict(self, offset=0):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "returncode": self.returncode,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "lines_total": self.lines_total,
+            "log": self.lines_since(offset)
+        }
+
+
+class JobManager:
+    """Фоновые задачи (краулер, пересборка индекса) в отдельных процессах.
+
+    Запуск через `python -u task.py ...` в подпроцессе не занимает event loop
+    и GIL сервера, дает построчный прогресс из stdout и честную отмену."""
+
+    def __init__(self, on_finish=None):
+        self.jobs = {}
+        # вызывается после завершения любой задачи (сброс кэша индекса): даже упавшая
+        # или отмененная задача могла успеть переписать часть файлов
+        self.on_finish = on_finish
+
+    def active(self):
+        return [job for job in self.jobs.values() if not job.finished]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def start(self, kind, args):
+        job = Job(kind, args)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job):
+        try:
+            job.process = await asyncio.create_subprocess_exec(
+                sys.executable, "-u", "task.py", *job.args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                # своя группа процессов, чтобы отмена остановила и воркеров пайплайна
+                start_new_session=True
+            )
+            if job.status == "cancelled":
+                # отмену запросили, пока процесс запускался
+                self._kill(job)
+            else:
+                job.status = "running"
+            job._notify()
+            async for raw in job.process.stdout:
+                job.add_line(raw.decode("utf-8", errors="replace").rstrip())
+            job.returncode = await job.process.wait()
+            if job.status != "cancelled":
+                job.status = "done" if job.returncode == 0 else "failed"
+        except asyncio.CancelledError:
+            # сервер останавливается: не оставляем пайплайн работать без присмотра
+            job.status = "cancelled"
+            if job.process is not None and job.process.returncode is None:
+                self._kill(job)
+                await job.process.wait()
+            raise
+        except Exception as e:
+            job.add_line(f"Ошибка запуска задачи: {e}")
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.completed = True
+            job._notify()
+
+        if self.on_finish:
+            self.on_finish(job)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.status = "cancelled"
+        # Если процесс еще запускается, _run остановит его сразу после старта.
+        # Завершенной задача станет, только когда процесс действительно выйдет.
+        if job.process is not None and job.process.returncode is None:
+            self._kill(job)
+        job._notify()
+        return job
+
+    @staticmethod
+    def _kill(job):
+        try:
+            os.killpg(job.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass  # процесс успел завершиться сам
+
+    async def stream(self, job):
+        """Асинхронный генератор строк лога до завершения задачи."""
+        offset = job.lines_total - len(job.log)
+        while True:
+            updated = job.updated
+            lines = job.lines_since(offset)
+            offset = job.lines_total
+            for line in lines:
+                yield line + "\n"
+            if job.finished:
+                yield f"[{job.status}]\n"
+                return
+            await updated.wait()
@@ -1,18 +1,87 @@
 import os
-import re
 import math
-from fastapi import FastAPI, Request, Query
-from fastapi.responses import HTMLResponse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import FastAPI, Request, Query, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from nltk.stem import WordNetLemmatizer
+
+from jobs import JobManager
+from tasks.four.index_pruner import pruned_source, tfidf_fingerprint
+from tasks.two.lexicon import Lexicon
+from tasks.two.text_store import TextStore
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
-lemmatizer = WordNetLemmatizer()
+
+SEARCH_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+SNIPPETS_TOP_K = 10  # для скольких первых результатов строить сниппеты
 
 # --- ЛОГИКА ПОИСКОВОГО ДВИЖКА ---
 
+# Индекс в каждом процессе пула загружается один раз (в _init_search_worker)
+_data = None
+
+
 def get_data():
+    global _data
+    if _data is None:
+        _data = load_data()
+    return _data
+
+
+def _init_search_worker():
+    get_data()
+
+
+def _warm_up():
+    pass
+
+
+def create_search_executor():
+    """Пул процессов для поиска.
+
+    Подсчет косинусной меры - чистый Python: в потоках он упирается в GIL,
+    и медленные запросы выполнялись бы по одному, отнимая время у event loop.
+    Процессы считают запросы параллельно, а сервер только ждет результат.
+
+    Процессы пула стартуют лениво, при первом submit, поэтому сразу отправляем
+    по пустой задаче на каждый: индекс загружается сейчас, а не при первом
+    запросе, который может прийти уже посреди следующей пересборки."""
+    executor = ProcessPoolExecutor(max_workers=SEARCH_WORKERS, initializer=_init_search_worker)
+    for _ in range(SEARCH_WORKERS):
+        executor.submit(_warm_up)
+    return executor
+
+
+search_executor = create_search_executor()
+
+
+def reset_data(job=None):
+    """После любой задачи (в том числе упавшей или отмененной) заменяет пул:
+    новые процессы загрузят индекс в его текущем виде, а запросы,
+    уже отправленные в старый пул, спокойно доработают."""
+    global search_executor
+    old_executor = search_executor
+    search_executor = create_search_executor()
+    old_executor.shutdown(wait=False)
+
+
+def pick_tfidf_dir(full_dir="tf_idf_lemmas", pruned_dir="tf_idf_lemmas_pruned"):
+    """Обрезанный индекс (без нулевых весов) читается быстрее и дает те же оценки,
+    но используется, только если он построен по текущему содержимому full_dir
+    (prune сохраняет отпечаток исходного TF-IDF рядом с индексом)."""
+    if not os.path.isdir(pruned_dir):
+        return full_dir
+    if not os.path.isdir(full_dir):
+        return pruned_dir
+    if pruned_source(pruned_dir) != tfidf_fingerprint(full_dir):
+        print(f"Папка {pruned_dir} устарела, используется {full_dir} (запустите task.py prune)")
+        return full_dir
+    return pruned_dir
+
+
+def load_data():
     url_map = {}
     if os.path.exists("index.txt"):
         with open("index.txt", "r", encoding="utf-8") as f:
@@ -23,8 +92,10 @@ def get_data():
     
     vectors = {}
     lengths = {}
-    for i in range(1, 101):
-        path = f"tf_idf_lemmas/{i}.txt"
+    tfidf_dir = pick_tfidf_dir()
+    tfidf_files = os.listdir(tfidf_dir) if os.path.exists(tfidf_dir) else []
+    for i in sorted(int(name.split(".")[0]) for name in tfidf_files if name.endswith(".txt")):
+        path = f"{tfidf_dir}/{i}.txt"
         if os.path.exists(path):
             vectors[i] = {}
             sum_sq = 0
@@ -36,24 +107,18 @@ def get_data():
                         vectors[i][lemma] = tfidf
                         sum_sq += tfidf**2
             lengths[i] = math.sqrt(sum_sq) if sum_sq > 0 else 1
-    return url_map, vectors, lengths
+    lexicon = Lexicon("data/lexicon.json")
+    text_store = TextStore("data/text")
+    return url_map, vectors, lengths, lexicon, text_store
 
-# --- ЭНДПОИНТЫ ---
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
-
-@app.get("/api/search")
-async def search(q: str = Query(None)):
-    if not q:
-        return []
-
-    url_map, doc_vectors, doc_lengths = get_data()
+def run_search(q):
+    url_map, doc_vectors, doc_lengths, lexicon, text_store = get_data()
     
     # Обработка запроса
-    query_words = re.findall(r'\b[a-zA-Z]+\b', q.lower())
-    query_lemmas = [lemmatizer.lemmatize(w) for w in query_words]
+    query_lemmas = lexicon.normalize(q)
+    if not query_lemmas:
+        return []
     
     query_vec = {}
     for l in query_lemmas:
@@ -81,14 +146,70 @@ async def search(q: str = Query(None)):
             })
 
     results.sort(key=lambda x: x['score'], reverse=True)
+    for item in results[:SNIPPETS_TOP_K]:
+        item["snippet"] = text_store.snippet(item["doc_id"], query_lemmas)
     return results
 
-# Дополнительный эндпоинт для запуска краулера (демо-версия)
+# --- ФОНОВЫЕ ЗАДАЧИ ---
+
+jobs = JobManager(on_finish=reset_data)
+
+
+def start_job(kind, args):
+    # Краулер и пересборка пишут в одни и те же файлы, поэтому одновременно - только одна задача
+    if jobs.active():
+        raise HTTPException(status_code=409, detail="Другая задача еще выполняется")
+    job = jobs.start(kind, args)
+    return job.to_dict()
+
+
+def get_job_or_404(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job
+
+# --- ЭНДПОИНТЫ ---
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    return templates.TemplateResponse("index.html", {"request": request})
+
+@app.get("/api/search")
+async def search(q: str = Query(None)):
+    if not q:
+        return []
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, run_search, q)
+
 @app.post("/api/crawl")
 async def crawl_endpoint():
-    # Здесь можно вызвать вашу функцию run_crawler()
-    # Для безопасности в демо возвращаем статус
-    return {"status": "Crawler started", "message": "100 pages are being processed"}
+    """Скачивает страницы и пересобирает все производные данные."""
+    return start_job("crawl", ["all", "--force"])
+
+@app.post("/api/rebuild")
+async def rebuild_endpoint():
+    """Пересобирает NLP, индекс и TF-IDF по уже скачанным страницам."""
+    return start_job("rebuild", ["all", "--skip", "crawl"])
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return [job.to_dict(offset=job.lines_total) for job in jobs.jobs.values()]
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str, offset: int = 0):
+    """Статус задачи и строки лога начиная с offset (для опроса)."""
+    return get_job_or_404(job_id).to_dict(offset=offset)
+
+@app.get("/api/jobs/{job_id}/stream")
+async def job_stream(job_id: str):
+    job = get_job_or_404(job_id)
+    return StreamingResponse(jobs.stream(job), media_type="text/plain")
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    get_job_or_404(job_id)
+    return jobs.cancel(job_id).to_dict(offset=0)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,327 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from tasks.one.crawler import Crawler
+from tasks.one.dedup import deduplicate
+from tasks.two.nlp_processor import NLPProcessor
+from tasks.three.search_engine import SearchEngine
+from tasks.four.tfidf_calculator import TFIDFCalculator
+from tasks.four.index_pruner import IndexPruner
+
+
+def fingerprint(paths):
+    """Считает хэш содержимого файлов и папок (рекурсивно).
+
+    Отсутствующий путь тоже учитывается, чтобы удаление выхода этапа
+    считалось изменением."""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    digest.update(file_path.encode("utf-8"))
+                    with open(file_path, "rb") as f:
+                        digest.update(hashlib.sha1(f.read()).digest())
+        elif os.path.isfile(path):
+            digest.update(path.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha1(f.read()).digest())
+        else:
+            digest.update(f"missing:{path}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Функции этапов вынесены на уровень модуля, чтобы их можно было
+# передать в дочерний процесс (pickle).
+
+def run_crawl(links_file, output_dir, index_file, duplicates_file):
+    with open(links_file, "r", encoding="utf-8") as file:
+        urls = json.load(file)
+    crawler = Crawler(output_dir=output_dir, index_file=index_file, duplicates_file=duplicates_file)
+    crawler.run_crawler_from_list(urls)
+
+
+def run_dedup(pages_dir, index_file, duplicates_file, derived_dirs):
+    deduplicate(
+        pages_dir=pages_dir,
+        index_file=index_file,
+        duplicates_file=duplicates_file,
+        derived_dirs=derived_dirs
+    )
+
+
+def run_nlp(input_dir, output_dir, index_file):
+    processor = NLPProcessor(input_dir=input_dir, output_dir=output_dir, index_file=index_file)
+    processor.process()
+
+
+def run_index(input_dir, output_file, index_file, data_dir):
+    engine = SearchEngine(
+        input_dir=input_dir,
+        output_file=output_file,
+        index_file=index_file,
+        data_dir=data_dir
+    )
+    engine.build_inverted_index()
+
+
+def run_tfidf(input_dir, output_tokens, output_lemmas, index_file, data_dir):
+    calculator = TFIDFCalculator(
+        input_dir=input_dir,
+        output_dir_tokens=output_tokens,
+        output_dir_lemmas=output_lemmas,
+        index_file=index_file,
+        data_dir=data_dir
+    )
+    calculator.calculate()
+
+
+def run_prune(input_dir, output_dir, champions_file, min_weight, champion_size):
+    pruner = IndexPruner(
+        input_dir=input_dir,
+        output_dir=output_dir,
+        champions_file=champions_file,
+        min_weight=min_weight,
+        champion_size=champion_size
+    )
+    pruner.prune()
+
+
+class Stage:
+    def __init__(self, name, func, kwargs, inputs, outputs, deps=()):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs
+        self.inputs = list(inputs)    # файлы/папки, от которых зависит результат
+        self.outputs = list(outputs)  # файлы/папки, которые этап создает
+        self.deps = list(deps)        # имена этапов, которые должны отработать раньше
+
+
+class Pipeline:
+    """Запускает этапы как DAG: независимые этапы выполняются параллельно,
+    а этапы, у которых не изменились ни входы, ни выходы, пропускаются."""
+
+    def __init__(
+        self,
+        stages,
+        state_file=".pipeline_state.json",
+        max_workers=None,
+        force=False,
+        skip=()
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.max_workers = max_workers
+        self.force = force
+        self.skip = set(skip)  # этапы, которые считаем выполненными (например, crawl без сети)
+        self.state = self._load_state()
+
+        for name in self.skip:
+            if name not in self.stages:
+                raise ValueError(f"Неизвестный этап '{name}'")
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Этап '{stage.name}' зависит от неизвестного этапа '{dep}'")
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # поврежденное состояние значит только то, что все этапы нужно пересчитать
+            print(f"[pipeline] {self.state_file} не читается, этапы будут пересчитаны")
+            return {}
+
+    def _save_state(self):
+        # Пишем во временный файл и подменяем: отмена (SIGTERM) посреди записи
+        # не оставит обрезанный JSON
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    @staticmethod
+    def inputs_fingerprint(stage):
+        """Хэш входов вместе с параметрами этапа (например, порогом обрезки)."""
+        params = json.dumps(stage.kwargs, sort_keys=True, default=str)
+        return hashlib.sha1((fingerprint(stage.inputs) + params).encode("utf-8")).hexdigest()
+
+    def is_up_to_date(self, stage, inputs_fp):
+        if self.force:
+            return False
+        saved = self.state.get(stage.name)
+        if not saved or saved.get("inputs") != inputs_fp:
+            return False
+        if not all(os.path.exists(path) for path in stage.outputs):
+            return False
+        return saved.get("outputs") == fingerprint(stage.outputs)
+
+    def run(self):
+        done = set()
+        pending = dict(self.stages)
+        running = {}  # future -> (stage, inputs_fp)
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [
+                    stage for stage in pending.values()
+                    if all(dep in done for dep in stage.deps)
+                ]
+                if not ready and not running:
+                    raise ValueError(f"Циклическая зависимость между этапами: {sorted(pending)}")
+
+                for stage in ready:
+                    del pending[stage.name]
+                    if stage.name in self.skip:
+                        print(f"[pipeline] {stage.name}: пропущен по запросу")
+                        done.add(stage.name)
+                        continue
+                    inputs_fp = self.inputs_fingerprint(stage)
+                    if self.is_up_to_date(stage, inputs_fp):
+                        print(f"[pipeline] {stage.name}: актуален, пропускаем")
+                        done.add(stage.name)
+                        continue
+                    print(f"[pipeline] {stage.name}: запуск")
+                    future = executor.submit(stage.func, **stage.kwargs)
+                    running[future] = (stage, inputs_fp)
+
+                # если все готовые этапы пропущены, сразу проверяем следующих
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, inputs_fp = running.pop(future)
+                    # исключение пробрасываем дальше: зависимые этапы не запускаем
+                    future.result()
+                    # этап, меняющий свои же входы (dedup), запоминает их уже измененными
+                    if set(stage.inputs) & set(stage.outputs):
+                        inputs_fp = self.inputs_fingerprint(stage)
+                    self.state[stage.name] = {
+                        "inputs": inputs_fp,
+                        "outputs": fingerprint(stage.outputs)
+                    }
+                    self._save_state()
+                    done.add(stage.name)
+                    print(f"[pipeline] {stage.name}: готово")
+
+        return done
+
+
+def derived_dirs(
+    data_dir="data",
+    tfidf_tokens_dir="tf_idf_tokens",
+    tfidf_lemmas_dir="tf_idf_lemmas",
+    pruned_dir="tf_idf_lemmas_pruned"
+):
+    """Папки с файлами {id}.*, построенными по страницам (их чистит dedup)."""
+    return [
+        os.path.join(data_dir, "tokens"),
+        os.path.join(data_dir, "lemmas"),
+        os.path.join(data_dir, "text"),
+        os.path.join(data_dir, "counts"),
+        tfidf_tokens_dir,
+        tfidf_lemmas_dir,
+        pruned_dir
+    ]
+
+
+def build_stages(
+    links_file="tasks/one/links.json",
+    pages_dir="pages",
+    index_file="index.txt",
+    duplicates_file="duplicates.json",
+    data_dir="data",
+    inverted_index_file="inverted_index.json",
+    tfidf_tokens_dir="tf_idf_tokens",
+    tfidf_lemmas_dir="tf_idf_lemmas",
+    pruned_dir="tf_idf_lemmas_pruned",
+    champions_file="champions.json",
+    min_weight=0.0,
+    champion_size=10
+):
+    """Описание пайплайна Заданий 1-4 (с удалением дубликатов после краулера
+    и обрезкой индекса после TF-IDF).
+
+    Во входы каждого этапа добавлен и его исходный код, чтобы правка
+    обработчика тоже приводила к пересчету. pos_tag выполняется только в nlp
+    и только для изменившихся страниц; index и tfidf читают data/counts."""
+    nlp_code = ["tasks/two/nlp_processor.py", "tasks/two/lexicon.py", "tasks/two/text_store.py"]
+    counts_dir = os.path.join(data_dir, "counts")
+    return [
+        Stage(
+            "crawl", run_crawl,
+            {
+                "links_file": links_file,
+                "output_dir": pages_dir,
+                "index_file": index_file,
+                "duplicates_file": duplicates_file
+            },
+            inputs=[links_file, "tasks/one/crawler.py", "tasks/one/dedup.py"],
+            outputs=[pages_dir, index_file, duplicates_file]
+        ),
+        Stage(
+            "dedup", run_dedup,
+            {
+                "pages_dir": pages_dir,
+                "index_file": index_file,
+                "duplicates_file": duplicates_file,
+                "derived_dirs": derived_dirs(data_dir, tfidf_tokens_dir, tfidf_lemmas_dir, pruned_dir)
+            },
+            inputs=[pages_dir, index_file, "tasks/one/dedup.py"],
+            outputs=[pages_dir, index_file, duplicates_file],
+            deps=["crawl"]
+        ),
+        Stage(
+            "nlp", run_nlp,
+            {"input_dir": pages_dir, "output_dir": data_dir, "index_file": index_file},
+            inputs=[pages_dir, index_file, *nlp_code],
+            outputs=[data_dir],
+            deps=["dedup"]
+        ),
+        Stage(
+            "index", run_index,
+            {
+                "input_dir": pages_dir,
+                "output_file": inverted_index_file,
+                "index_file": index_file,
+                "data_dir": data_dir
+            },
+            inputs=[counts_dir, index_file, "tasks/three/search_engine.py"],
+            outputs=[inverted_index_file],
+            deps=["nlp"]
+        ),
+        Stage(
+            "tfidf", run_tfidf,
+            {
+                "input_dir": pages_dir,
+                "output_tokens": tfidf_tokens_dir,
+                "output_lemmas": tfidf_lemmas_dir,
+                "index_file": index_file,
+                "data_dir": data_dir
+            },
+            inputs=[counts_dir, index_file, "tasks/four/tfidf_calculator.py"],
+            outputs=[tfidf_tokens_dir, tfidf_lemmas_dir],
+            deps=["nlp"]
+        ),
+        Stage(
+            "prune", run_prune,
+            {
+                "input_dir": tfidf_lemmas_dir,
+                "output_dir": pruned_dir,
+                "champions_file": champions_file,
+                "min_weight": min_weight,
+                "champion_size": champion_size
+            },
+            inputs=[tfidf_lemmas_dir, "tasks/four/index_pruner.py"],
+            outputs=[pruned_dir, champions_file],
+            deps=["tfidf"]
+        ),
+    ]
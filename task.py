@@ -2,10 +2,13 @@ import argparse
 import json
 
 from tasks.one.crawler import Crawler
+from tasks.one.dedup import deduplicate
 from tasks.two.nlp_processor import NLPProcessor
 from tasks.three.search_engine import SearchEngine, start
 from tasks.four.tfidf_calculator import TFIDFCalculator
-from tasks.five.search_engine_v2 import VectorSearchEngine, start_interactive_search
+from tasks.four.index_pruner import IndexPruner
+from tasks.five.search_engine_v2 import VectorSearchEngine, start_interactive_search, recall_report
+from pipeline import Pipeline, build_stages, derived_dirs
 
 
 class TaskScripts:
@@ -16,18 +19,42 @@ class TaskScripts:
             
         crawler = Crawler(
             output_dir=args.output_dir,
-            index_file=args.index_file
+            index_file=args.index_file,
+            duplicates_file=args.duplicates_file
         )
         crawler.run_crawler_from_list(urls)
+
+    @staticmethod
+    def run_dedup(args):
+        deduplicate(
+            pages_dir=args.input_dir,
+            index_file=args.index_file,
+            duplicates_file=args.duplicates_file,
+            derived_dirs=derived_dirs(
+                data_dir=args.data_dir,
+                tfidf_tokens_dir=args.output_tokens,
+                tfidf_lemmas_dir=args.output_lemmas,
+                pruned_dir=args.output_pruned
+            )
+        )
     
     @staticmethod
     def run_nlp(args):
-        processor = NLPProcessor(input_dir=args.input_dir, output_dir=args.output_dir)
+        processor = NLPProcessor(
+            input_dir=args.input_dir,
+            output_dir=args.output_dir,
+            index_file=args.index_file
+        )
         processor.process()
 
     @staticmethod
     def run_search_engine(args):
-        engine = SearchEngine(input_dir=args.input_dir, output_file=args.output_file)
+        engine = SearchEngine(
+            input_dir=args.input_dir,
+            output_file=args.output_file,
+            index_file=args.index_file,
+            data_dir=args.data_dir
+        )
         inverted_index = engine.build_inverted_index()
         start(engine, inverted_index)
     
@@ -36,17 +63,57 @@ class TaskScripts:
         calculator = TFIDFCalculator(
             input_dir=args.input_dir,
             output_dir_tokens=args.output_tokens,
-            output_dir_lemmas=args.output_lemmas
+            output_dir_lemmas=args.output_lemmas,
+            index_file=args.index_file,
+            data_dir=args.data_dir
         )
         calculator.calculate()
 
+    @staticmethod
+    def run_prune(args):
+        pruner = IndexPruner(
+            input_dir=args.input_dir,
+            output_dir=args.output_dir,
+            champions_file=args.champions_file,
+            min_weight=args.min_weight,
+            champion_size=args.champion_size
+        )
+        pruner.prune()
+
     @staticmethod
     def run_vector_search(args):
         engine = VectorSearchEngine(
             tfidf_dir=args.tfidf_dir,
-            index_file=args.index_file
+            index_file=args.index_file,
+            champions_file=args.champions_file
         )
-        start_interactive_search(engine)
+        if args.report:
+            recall_report(engine, k=args.top_k)
+            return
+        start_interactive_search(engine, approximate=args.approximate)
+
+    @staticmethod
+    def run_pipeline(args):
+        stages = build_stages(
+            pages_dir=args.pages_dir,
+            index_file=args.index_file,
+            duplicates_file=args.duplicates_file,
+            data_dir=args.data_dir,
+            inverted_index_file=args.inverted_index,
+            tfidf_tokens_dir=args.output_tokens,
+            tfidf_lemmas_dir=args.output_lemmas,
+            pruned_dir=args.output_pruned,
+            champions_file=args.champions_file,
+            min_weight=args.min_weight,
+            champion_size=args.champion_size
+        )
+        pipeline = Pipeline(
+            stages,
+            max_workers=args.jobs,
+            force=args.force,
+            skip=args.skip
+        )
+        pipeline.run()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -68,7 +135,27 @@ def main():
         required=True, 
         help="Файл сохранения 'Выкачки'."
     )
+    crawl_parser.add_argument(
+        "-df", "--duplicates-file",
+        default="duplicates.json",
+        help="Файл с URL дубликатов для каждого документа."
+    )
     crawl_parser.set_defaults(func=TaskScripts.run_crawler)
+
+    # === Удаление почти одинаковых страниц ===
+    dedup_parser = subparsers.add_parser("dedup", help="Схлопнуть дубликаты уже скачанных страниц")
+    dedup_parser.add_argument("-id", "--input-dir", default="pages", help="Путь до папки со страницами.")
+    dedup_parser.add_argument("-if", "--index-file", default="index.txt", help="Файл 'Выкачки'.")
+    dedup_parser.add_argument(
+        "-df", "--duplicates-file",
+        default="duplicates.json",
+        help="Файл с URL дубликатов для каждого документа."
+    )
+    dedup_parser.add_argument("-dd", "--data-dir", default="data", help="Папка токенов и лемм.")
+    dedup_parser.add_argument("-ot", "--output-tokens", default="tf_idf_tokens", help="Папка TF-IDF токенов.")
+    dedup_parser.add_argument("-ol", "--output-lemmas", default="tf_idf_lemmas", help="Папка TF-IDF лемм.")
+    dedup_parser.add_argument("-op", "--output-pruned", default="tf_idf_lemmas_pruned", help="Папка обрезанного индекса.")
+    dedup_parser.set_defaults(func=TaskScripts.run_dedup)
     
     # === Задание 2: NLP и Лемматизация ===
     nlp_parser = subparsers.add_parser("nlp", help="Извлечь токены и леммы (Задание 2)")
@@ -82,6 +169,7 @@ def main():
         required=True,
         help="Путь до папки сохранения токенов и лемм."
     )
+    nlp_parser.add_argument("-if", "--index-file", default="index.txt", help="Файл 'Выкачки' (список документов).")
     nlp_parser.set_defaults(func=TaskScripts.run_nlp)
     
     # === Задание 3: Инвертированный индекс ===
@@ -96,6 +184,8 @@ def main():
         required=True,
         help="Название файла для сохранения."
     )
+    index_parser.add_argument("-if", "--index-file", default="index.txt", help="Файл 'Выкачки' (список документов).")
+    index_parser.add_argument("-dd", "--data-dir", default="data", help="Папка результатов Задания 2 (кэш лемм).")
     index_parser.set_defaults(func=TaskScripts.run_search_engine)
 
     # === Задание 4: TF-IDF ===
@@ -103,8 +193,24 @@ def main():
     tfidf_parser.add_argument("-id", "--input-dir", required=True, help="Путь до папки со страницами.")
     tfidf_parser.add_argument("-ot", "--output-tokens", default="tf_idf_tokens", help="Папка для токенов.")
     tfidf_parser.add_argument("-ol", "--output-lemmas", default="tf_idf_lemmas", help="Папка для лемм.")
+    tfidf_parser.add_argument("-if", "--index-file", default="index.txt", help="Файл 'Выкачки' (список документов).")
+    tfidf_parser.add_argument("-dd", "--data-dir", default="data", help="Папка результатов Задания 2 (кэш лемм).")
     tfidf_parser.set_defaults(func=TaskScripts.run_tfidf)
 
+    # === Обрезка индекса и списки чемпионов ===
+    prune_parser = subparsers.add_parser("prune", help="Обрезать TF-IDF индекс и построить списки чемпионов")
+    prune_parser.add_argument("-id", "--input-dir", default="tf_idf_lemmas", help="Папка с TF-IDF лемм.")
+    prune_parser.add_argument("-od", "--output-dir", default="tf_idf_lemmas_pruned", help="Папка для обрезанного индекса.")
+    prune_parser.add_argument("-cf", "--champions-file", default="champions.json", help="Файл списков чемпионов.")
+    prune_parser.add_argument(
+        "-mw", "--min-weight",
+        type=float,
+        default=0.0,
+        help="Записи с TF-IDF не больше этого значения удаляются."
+    )
+    prune_parser.add_argument("-cs", "--champion-size", type=int, default=10, help="Размер списка чемпионов.")
+    prune_parser.set_defaults(func=TaskScripts.run_prune)
+
     # === Задание 5: Векторный поиск ===
     search_parser = subparsers.add_parser("search", help="Запустить векторный поиск (Задание 5)")
     search_parser.add_argument(
@@ -117,7 +223,46 @@ def main():
         default="index.txt", 
         help="Файл со ссылками выкачки."
     )
+    search_parser.add_argument("-cf", "--champions-file", default="champions.json", help="Файл списков чемпионов.")
+    search_parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="Считать сходство только для документов из списков чемпионов."
+    )
+    search_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Вместо поиска вывести отчет recall@k / время для разных размеров списков чемпионов."
+    )
+    search_parser.add_argument("-k", "--top-k", type=int, default=10, help="k для recall@k в отчете.")
     search_parser.set_defaults(func=TaskScripts.run_vector_search)
+
+    # === Весь пайплайн (Задания 1-4) ===
+    all_parser = subparsers.add_parser(
+        "all",
+        aliases=["build"],
+        help="Запустить все этапы, пропуская актуальные (Задания 1-4)"
+    )
+    all_parser.add_argument("-pd", "--pages-dir", default="pages", help="Папка со страницами.")
+    all_parser.add_argument("-if", "--index-file", default="index.txt", help="Файл 'Выкачки'.")
+    all_parser.add_argument("-df", "--duplicates-file", default="duplicates.json", help="Файл с URL дубликатов.")
+    all_parser.add_argument("-dd", "--data-dir", default="data", help="Папка токенов и лемм.")
+    all_parser.add_argument("-ii", "--inverted-index", default="inverted_index.json", help="Файл инвертированного индекса.")
+    all_parser.add_argument("-ot", "--output-tokens", default="tf_idf_tokens", help="Папка TF-IDF токенов.")
+    all_parser.add_argument("-ol", "--output-lemmas", default="tf_idf_lemmas", help="Папка TF-IDF лемм.")
+    all_parser.add_argument("-op", "--output-pruned", default="tf_idf_lemmas_pruned", help="Папка обрезанного индекса.")
+    all_parser.add_argument("-cf", "--champions-file", default="champions.json", help="Файл списков чемпионов.")
+    all_parser.add_argument("-mw", "--min-weight", type=float, default=0.0, help="Порог обрезки TF-IDF.")
+    all_parser.add_argument("-cs", "--champion-size", type=int, default=10, help="Размер списка чемпионов.")
+    all_parser.add_argument("-j", "--jobs", type=int, default=None, help="Число параллельных процессов.")
+    all_parser.add_argument("--force", action="store_true", help="Пересчитать все этапы.")
+    all_parser.add_argument(
+        "--skip",
+        nargs="*",
+        default=[],
+        help="Этапы, которые не нужно запускать (например: --skip crawl)."
+    )
+    all_parser.set_defaults(func=TaskScripts.run_pipeline)
     
     args = parser.parse_args()
 
@@ -1,24 +1,37 @@
 import os
-import re
+import json
 import math
-import nltk
+import time
+import random
+from collections import defaultdict
 
-from tasks.two.nlp_processor import NLPProcessor, lemmatizer
+from tasks.two.lexicon import Lexicon
+from tasks.four.index_pruner import build_champion_lists
+from tasks.two.text_store import TextStore
 
 class VectorSearchEngine:
     def __init__(
         self, 
         tfidf_dir="tf_idf_lemmas", 
-        index_file="index.txt"
+        index_file="index.txt",
+        lexicon_file="data/lexicon.json",
+        text_dir="data/text",
+        champions_file="champions.json"
     ):
         self.tfidf_dir = tfidf_dir
         self.index_file = index_file
+        self.lexicon = Lexicon(lexicon_file)
+        self.text_store = TextStore(text_dir)
         
         self.doc_vectors = {}  # doc_id -> {lemma: tf_idf_weight}
         self.doc_lengths = {}  # doc_id -> длина вектора (для косинусного сходства)
         self.url_map = {}      # doc_id -> url
+        self.champions = {}    # lemma -> doc_id с наибольшим TF-IDF (для приближенного поиска)
         
         self._load_data()
+        if os.path.exists(champions_file):
+            with open(champions_file, "r", encoding="utf-8") as f:
+                self.champions = json.load(f)
 
     def _load_data(self):
         print("Загрузка данных TF-IDF и ссылок...")
@@ -61,24 +74,18 @@ class VectorSearchEngine:
             
         print(f"Успешно загружены векторы для {len(self.doc_vectors)} документов.")
 
-    def search(self, query):
-        """Выполняет векторный поиск по запросу."""
-        # 1. Извлекаем слова из запроса
-        words = re.findall(r'\b[a-zA-Z]+\b', query)
-        words = [w.lower() for w in words]
-        
-        # 2. Обрабатываем запрос через методы NLPProcessor (ПЕРЕИСПОЛЬЗОВАНИЕ)
-        query_lemmas = []
-        tagged_words = nltk.pos_tag(words)
-        for token, pos_tag in tagged_words:
-            # Отсеиваем предлоги и союзы из запроса так же, как в текстах
-            if pos_tag in NLPProcessor.STOP_TAGS:
-                continue
-            
-            wn_pos = NLPProcessor.get_wordnet_pos(pos_tag)
-            lemma = lemmatizer.lemmatize(token, pos=wn_pos)
-            query_lemmas.append(lemma)
-            
+    def search(self, query, approximate=False):
+        """Выполняет векторный поиск по запросу.
+
+        approximate=True - считать сходство только для документов из списков
+        чемпионов лемм запроса (быстрее, но часть результатов может потеряться)."""
+        # 1-2. Нормализуем запрос через словарь словоформ, построенный при индексации.
+        # Предлоги и союзы в словарь не попадают, а значит и в индексе их нет.
+        query_lemmas = self.lexicon.normalize(query)
+        return self.rank(query_lemmas, approximate=approximate)
+
+    def rank(self, query_lemmas, approximate=False, champions=None):
+        """Ранжирует документы по уже нормализованному запросу."""
         if not query_lemmas:
             return []
 
@@ -89,9 +96,21 @@ class VectorSearchEngine:
             
         q_len = math.sqrt(sum(v**2 for v in query_vec.values())) if query_vec else 1
 
-        # 4. Считаем косинусное сходство
+        # 4. Выбираем кандидатов: все документы или только чемпионы
+        if approximate:
+            champions = self.champions if champions is None else champions
+            candidates = set()
+            for lemma in query_vec:
+                candidates.update(champions.get(lemma, []))
+        else:
+            candidates = self.doc_vectors.keys()
+
+        # 5. Считаем косинусное сходство
         results = []
-        for doc_id, doc_vec in self.doc_vectors.items():
+        for doc_id in candidates:
+            doc_vec = self.doc_vectors.get(doc_id)
+            if doc_vec is None:
+                continue
             dot_product = 0
             for lemma, q_weight in query_vec.items():
                 if lemma in doc_vec:
@@ -108,7 +127,77 @@ class VectorSearchEngine:
         # Сортируем по убыванию релевантности
         return sorted(results, key=lambda x: x["score"], reverse=True)
 
-def start_interactive_search(engine: VectorSearchEngine):
+    def snippet(self, doc_id, query):
+        """Сниппет документа с подсвеченными (в *звездочках*) словами запроса."""
+        snippet = self.text_store.snippet(doc_id, self.lexicon.normalize(query))
+        if snippet is None:
+            return None
+        return "".join(
+            f"*{text}*" if is_match else text
+            for text, is_match in snippet["segments"]
+        )
+
+def recall_report(engine: VectorSearchEngine, sizes=(1, 2, 5, 10, 20, 50), k=10, num_queries=200, seed=42):
+    """Сравнивает точный поиск с поиском по спискам чемпионов разного размера.
+
+    Запросы из 1-3 лемм берутся из самого индекса двумя способами:
+      uniform - любая лемма словаря равновероятна. Большинство лемм встречается
+                в нескольких документах, и список чемпионов для них совпадает
+                со всем списком документов, так что recall тут почти всегда высокий;
+      by df   - вероятность леммы пропорциональна числу документов с ней,
+                как у реальных запросов из частых слов.
+    Эталон - точный поиск. Печатает recall@k и среднее время запроса."""
+    rng = random.Random(seed)
+    df = defaultdict(int)
+    for vec in engine.doc_vectors.values():
+        for lemma in vec:
+            df[lemma] += 1
+    vocabulary = sorted(df)
+    if not vocabulary:
+        print("Индекс пуст.")
+        return {}
+    weights = [df[lemma] for lemma in vocabulary]
+
+    def weighted_query(size):
+        query = set()
+        while len(query) < min(size, len(vocabulary)):
+            query.add(rng.choices(vocabulary, weights=weights)[0])
+        return sorted(query)
+
+    groups = {
+        "uniform": [rng.sample(vocabulary, rng.randint(1, 3)) for _ in range(num_queries)],
+        "by df": [weighted_query(rng.randint(1, 3)) for _ in range(num_queries)],
+    }
+
+    def measure(queries, approximate, champions=None):
+        rankings = []
+        started = time.perf_counter()
+        for lemmas in queries:
+            results = engine.rank(lemmas, approximate=approximate, champions=champions)
+            rankings.append([r["doc_id"] for r in results[:k]])
+        return rankings, (time.perf_counter() - started) / len(queries) * 1000
+
+    exact = {name: measure(queries, approximate=False) for name, queries in groups.items()}
+    report = {name: [("exact", 1.0, ms)] for name, (_, ms) in exact.items()}
+    for size in sizes:
+        champions = build_champion_lists(engine.doc_vectors, size)
+        for name, queries in groups.items():
+            approx, approx_ms = measure(queries, approximate=True, champions=champions)
+            recalls = [
+                len(set(a) & set(e)) / len(e)
+                for a, e in zip(approx, exact[name][0]) if e
+            ]
+            report[name].append((f"r={size}", sum(recalls) / len(recalls) if recalls else 1.0, approx_ms))
+
+    header = " | ".join(f"{f'{name}: R@{k}':>14} | {'мс/запрос':>9}" for name in groups)
+    print(f"\n{'Режим':<8} | {header}")
+    print("-" * (11 + 29 * len(groups)))
+    for i, (mode, _, _) in enumerate(report["uniform"]):
+        cells = " | ".join(f"{report[name][i][1]:>14.3f} | {report[name][i][2]:>9.3f}" for name in groups)
+        print(f"{mode:<8} | {cells}")
+    return report
+
+def start_interactive_search(engine: VectorSearchEngine, approximate=False):
     print("\n" + "="*40)
     print("ВЕКТОРНЫЙ ПОИСК ГОТОВ")
     print("="*40)
@@ -118,7 +207,7 @@ def start_interactive_search(engine: VectorSearchEngine):
         if query.lower() == 'exit':
             break
             
-        results = engine.search(query)
+        results = engine.search(query, approximate=approximate)
         
         if not results:
             print("❌ Ничего не найдено. Попробуйте другие ключевые слова.")
@@ -126,4 +215,7 @@ def start_interactive_search(engine: VectorSearchEngine):
             print(f"✅ Найдено результатов: {len(results)}")
             # Показываем Топ-10
             for rank, res in enumerate(results[:10], 1):
-                print(f"{rank}. [{res['score']:.4f}] Doc #{res['doc_id']:<3} | {res['url']}")
\ No newline at end of file
+                print(f"{rank}. [{res['score']:.4f}] Doc #{res['doc_id']:<3} | {res['url']}")
+                snippet = engine.snippet(res['doc_id'], query)
+                if snippet:
+                    print(f"   ...{snippet}...")
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import json
+import shutil
+import hashlib
+from collections import defaultdict
+
+
+def build_champion_lists(doc_vectors, size):
+    """Для каждой леммы - size документов с наибольшим TF-IDF (по убыванию веса)."""
+    postings = defaultdict(list)
+    for doc_id, vector in doc_vectors.items():
+        for lemma, weight in vector.items():
+            postings[lemma].append((weight, doc_id))
+    return {
+        lemma: [doc_id for _, doc_id in sorted(docs, key=lambda x: (-x[0], x[1]))[:size]]
+        for lemma, docs in postings.items()
+    }
+
+
+SOURCE_FILE = "source.json"  # отпечаток TF-IDF, по которому построен обрезанный индекс
+
+
+def tfidf_fingerprint(directory):
+    """Хэш содержимого файлов {id}.txt папки TF-IDF (None, если папки нет)."""
+    if not os.path.isdir(directory):
+        return None
+    digest = hashlib.sha1()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".txt"):
+            continue
+        digest.update(filename.encode("utf-8"))
+        with open(os.path.join(directory, filename), "rb") as f:
+            digest.update(hashlib.sha1(f.read()).digest())
+    return digest.hexdigest()
+
+
+def pruned_source(pruned_dir):
+    """Отпечаток TF-IDF, из которого построена pruned_dir (None, если неизвестен)."""
+    path = os.path.join(pruned_dir, SOURCE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("source")
+
+
+class IndexPruner:
+    """Статическая обрезка TF-IDF индекса (после Задания 4).
+
+    Термины с нулевым весом (IDF = 0, встречаются во всех документах) и
+    веса не больше min_weight ничего не дают косинусной мере, но занимают
+    место и время загрузки. Для min_weight=0 результаты поиска не меняются."""
+
+    def __init__(
+        self,
+        input_dir="tf_idf_lemmas",
+        output_dir="tf_idf_lemmas_pruned",
+        champions_file="champions.json",
+        min_weight=0.0,
+        champion_size=10
+    ):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.champions_file = champions_file
+        self.min_weight = min_weight
+        self.champion_size = champion_size
+
+    def prune(self):
+        # Индекс собирается во временной папке и подменяет старый целиком:
+        # прерванный запуск не оставляет наполовину записанный output_dir
+        tmp_dir = f"{self.output_dir}.tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        source = tfidf_fingerprint(self.input_dir)
+
+        doc_vectors = {}
+        kept = dropped = 0
+        for filename in os.listdir(self.input_dir):
+            if not filename.endswith(".txt"):
+                continue
+            doc_id = int(filename.split(".")[0])
+            doc_vectors[doc_id] = {}
+
+            with open(os.path.join(self.input_dir, filename), "r", encoding="utf-8") as src, \
+                    open(os.path.join(tmp_dir, filename), "w", encoding="utf-8") as dst:
+                for line in src:
+                    parts = line.strip().split()
+                    if len(parts) < 3:
+                        continue
+                    tfidf = float(parts[2])
+                    if tfidf <= self.min_weight:
+                        dropped += 1
+                        continue
+                    kept += 1
+                    doc_vectors[doc_id][parts[0]] = tfidf
+                    dst.write(line)
+
+        with open(os.path.join(tmp_dir, SOURCE_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {"source": source, "min_weight": self.min_weight, "champion_size": self.champion_size},
+                f, indent=4
+            )
+
+        champions = build_champion_lists(doc_vectors, self.champion_size)
+        tmp_champions = f"{self.champions_file}.tmp"
+        with open(tmp_champions, "w", encoding="utf-8") as f:
+            json.dump(champions, f, ensure_ascii=False, separators=(",", ":"))
+
+        # Папку нельзя заменить через os.replace поверх непустой, поэтому старая
+        # сначала отодвигается; при сбое между шагами индекса просто нет,
+        # и поиск берет полный TF-IDF
+        old_dir = f"{self.output_dir}.old"
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        if os.path.exists(self.output_dir):
+            os.replace(self.output_dir, old_dir)
+        os.replace(tmp_dir, self.output_dir)
+        os.replace(tmp_champions, self.champions_file)
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+
+        print(f"Оставлено записей: {kept}, удалено: {dropped}")
+        print(f"Готово! Индекс сохранен в '{self.output_dir}', списки чемпионов - в '{self.champions_file}'.")
+        return doc_vectors, champions
@@ -6,6 +6,8 @@ import requests
 import json
 from requests.compat import urlparse
 
+from tasks.one.dedup import NearDuplicateIndex, page_words, simhash, save_duplicates
+
 
 class Crawler:
     def __init__(
@@ -16,19 +18,25 @@ class Crawler:
         headers={
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         },
-        saved_json_path="links.json"
+        saved_json_path="links.json",
+        duplicates_file="duplicates.json"
     ):
         self.output_dir = output_dir
         self.index_file = index_file
         self.max_pages = max_pages
         self.headers = headers
         self.saved_json_path = saved_json_path
+        self.duplicates_file = duplicates_file
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
     def run_crawler_from_list(self, urls: list):
         queue = urls
         count = 1
+        # Редиректы и зеркала Википедии дают одну и ту же статью под разными URL:
+        # такие страницы не сохраняем, а запоминаем URL у первого документа
+        near_duplicates = NearDuplicateIndex()
+        duplicates = {}
         with open(self.index_file, "w", encoding="utf-8") as index_file:
             while queue:
                 url = queue.pop(0)
@@ -36,6 +44,15 @@ class Crawler:
                     response = requests.get(url, headers=self.headers, timeout=10)
                     response.raise_for_status()
 
+                    fingerprint = simhash(page_words(response.text))
+                    canonical = near_duplicates.find(fingerprint)
+                    if canonical is not None:
+                        duplicates[canonical].append(url)
+                        print(f"Дубликат документа {canonical}: {url}")
+                        continue
+                    near_duplicates.add(count, fingerprint)
+                    duplicates[count] = [url]
+
                     file_name = f"{count}.txt"
                     file_path = os.path.join(self.output_dir, file_name)
                     
@@ -48,6 +65,19 @@ class Crawler:
                     print(f"Ошибка при загрузке {url}: {e}")
                     queue.append(url)
 
+        # Дубликаты не сохраняются, поэтому страниц может стать меньше, чем в прошлый раз:
+        # удаляем файлы прошлой выкачки, которые больше не входят в index.txt
+        for name in os.listdir(self.output_dir):
+            prefix = name.split(".")[0]
+            if name.endswith(".txt") and prefix.isdigit() and int(prefix) >= count:
+                os.remove(os.path.join(self.output_dir, name))
+
+        # Сохраняем только документы, у которых есть дубликаты
+        save_duplicates(
+            {doc_id: doc_urls for doc_id, doc_urls in duplicates.items() if len(doc_urls) > 1},
+            self.duplicates_file
+        )
+
     def run_crawler_with_gen_urls(self, start_url):
         visited = set()
         queue = [start_url]
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import hashlib
+from collections import Counter, defaultdict
+
+
+SCRIPT_RE = re.compile(r'<(script|style)\b.*?</\1>', re.S | re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+
+
+def page_words(html):
+    """Грубое извлечение слов из HTML для отпечатка.
+
+    BeautifulSoup здесь не нужен: для SimHash важен только набор слов,
+    а регулярные выражения в разы быстрее полного разбора страницы."""
+    text = TAG_RE.sub(' ', SCRIPT_RE.sub(' ', html))
+    return [w.lower() for w in WORD_RE.findall(text)]
+
+
+def simhash(words, shingle_size=3, bits=64):
+    """SimHash по шинглам из shingle_size слов."""
+    shingles = Counter(
+        ' '.join(words[i:i + shingle_size])
+        for i in range(max(len(words) - shingle_size + 1, 1))
+    )
+    weights = [0] * bits
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+
+class NearDuplicateIndex:
+    """LSH по SimHash: отпечаток режется на bands полос.
+
+    Если расстояние Хэмминга между отпечатками не больше max_distance
+    и bands > max_distance, то хотя бы одна полоса совпадает целиком
+    (принцип Дирихле), поэтому кандидаты ищутся по полосам, а не перебором."""
+
+    def __init__(self, max_distance=3, bits=64, bands=4):
+        if bands <= max_distance:
+            raise ValueError("Число полос должно быть больше max_distance")
+        self.max_distance = max_distance
+        self.bits = bits
+        self.bands = bands
+        self.band_size = bits // bands
+        self.buckets = defaultdict(list)  # (номер полосы, значение) -> doc_id
+        self.fingerprints = {}            # doc_id -> отпечаток
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_size) - 1
+        for band in range(self.bands):
+            yield band, fingerprint >> (band * self.band_size) & mask
+
+    def find(self, fingerprint):
+        """Возвращает doc_id ближайшего дубликата или None."""
+        best = None
+        for key in self._band_keys(fingerprint):
+            for doc_id in self.buckets.get(key, []):
+                distance = bin(fingerprint ^ self.fingerprints[doc_id]).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, doc_id)
+        return best[1] if best else None
+
+    def add(self, doc_id, fingerprint):
+        self.fingerprints[doc_id] = fingerprint
+        for key in self._band_keys(fingerprint):
+            self.buckets[key].append(doc_id)
+
+
+def load_duplicates(duplicates_file):
+    """canonical doc_id -> все URL, которые ведут на этот документ."""
+    if not os.path.exists(duplicates_file):
+        return {}
+    with open(duplicates_file, "r", encoding="utf-8") as f:
+        return {int(doc_id): urls for doc_id, urls in json.load(f).items()}
+
+
+def save_duplicates(duplicates, duplicates_file):
+    with open(duplicates_file, "w", encoding="utf-8") as f:
+        json.dump(
+            {str(doc_id): urls for doc_id, urls in sorted(duplicates.items())},
+            f, indent=4, ensure_ascii=False
+        )
+
+
+def deduplicate(
+    pages_dir="pages",
+    index_file="index.txt",
+    duplicates_file="duplicates.json",
+    derived_dirs=(),
+    max_distance=3
+):
+    """Схлопывает почти одинаковые страницы уже скачанного корпуса.
+
+    Остается страница с меньшим doc_id: в index.txt пишутся только такие,
+    файлы дубликатов удаляются из pages_dir (и их производные из derived_dirs),
+    а все URL сохраняются в duplicates_file."""
+    urls = {}
+    with open(index_file, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(' ', 1)
+            if len(parts) == 2:
+                urls[int(parts[0])] = parts[1]
+
+    duplicates = load_duplicates(duplicates_file)
+    index = NearDuplicateIndex(max_distance=max_distance)
+    removed = []
+    for doc_id in sorted(urls):
+        path = os.path.join(pages_dir, f"{doc_id}.txt")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            fingerprint = simhash(page_words(f.read()))
+
+        canonical = index.find(fingerprint)
+        if canonical is None:
+            index.add(doc_id, fingerprint)
+            continue
+
+        # Переносим все URL дубликата (включая уже найденные раньше) на канонический документ
+        aliases = duplicates.pop(doc_id, [urls[doc_id]])
+        merged = duplicates.setdefault(canonical, [urls[canonical]])
+        merged.extend(url for url in aliases if url not in merged)
+        removed.append(doc_id)
+        print(f"Документ {doc_id} ({urls[doc_id]}) - дубликат документа {canonical}")
+
+    for doc_id in removed:
+        del urls[doc_id]
+        os.remove(os.path.join(pages_dir, f"{doc_id}.txt"))
+        for directory in derived_dirs:
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.split(".")[0] == str(doc_id):
+                    os.remove(os.path.join(directory, name))
+
+    with open(index_file, "w", encoding="utf-8") as f:
+        for doc_id in sorted(urls):
+            f.write(f"{doc_id} {urls[doc_id]}\n")
+    save_duplicates(duplicates, duplicates_file)
+
+    print(f"Найдено дубликатов: {len(removed)}, осталось документов: {len(urls)}")
+    return removed
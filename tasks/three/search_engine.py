@@ -1,35 +1,34 @@
-import os
 import re
 import json
 from collections import defaultdict
 
-from tasks.two.nlp_processor import NLPProcessor, lemmatizer
+from tasks.two.nlp_processor import NLPProcessor, lemmatizer, list_doc_ids
 
 class SearchEngine:
     def __init__(
         self,
         input_dir="pages",
-        output_file="inverted_index.json"
+        output_file="inverted_index.json",
+        index_file="index.txt",
+        data_dir="data"
     ):
         self.input_dir = input_dir
         self.output_file = output_file
+        self.index_file = index_file
+        self.data_dir = data_dir
         
     def build_inverted_index(self):
         inverted_index = defaultdict(set)
-        processor = NLPProcessor(input_dir=self.input_dir)
+        # Леммы берутся из результатов Задания 2 (data/counts), pos_tag повторно не запускается
+        processor = NLPProcessor(input_dir=self.input_dir, output_dir=self.data_dir, index_file=self.index_file)
         
-        total_docs = len(os.listdir(processor.input_dir))
-        for i in range(total_docs):
-            doc_id = i + 1
-            words = processor.extract_text(doc_id)
-            if not words:
+        for doc_id in list_doc_ids(self.input_dir, self.index_file):
+            counts = processor.load_counts(doc_id)
+            if not counts:
                 continue
-            tokens, lemmas = processor.process_tokens_and_lemmas(words)
 
-            for lemma in lemmas.keys():
+            for lemma in counts["lemmas"].keys():
                 inverted_index[lemma].add(doc_id)
-                
-            print(f"Обработана {doc_id}-ая страница.")
     
         with open(self.output_file, "w", encoding="utf-8") as file:
             json_dict = {
@@ -69,10 +68,10 @@ def parse_query_to_postfix(query):
     return output
 
 
-def evaluate_postfix(postfix_query, inverted_index, total_docs):
+def evaluate_postfix(postfix_query, inverted_index, all_docs):
     """Вычисляет результат запроса используя множества (sets)"""
     stack = []
-    all_docs = set(range(1, total_docs + 1))
+    all_docs = set(all_docs)
     
     try:
         for token in postfix_query:
@@ -100,7 +99,7 @@ def start(engine: SearchEngine, inverted_index: defaultdict):
     print("\nВведите булев запрос на английском (например: (cat AND dog) OR NOT bird).")
     print("Для выхода введите 'exit'.")
     
-    total_docs = len(os.listdir(engine.input_dir))
+    all_docs = list_doc_ids(engine.input_dir, engine.index_file)
     
     while True:
         query = input("\nВаш запрос: ")
@@ -108,7 +107,7 @@ def start(engine: SearchEngine, inverted_index: defaultdict):
             break
             
         postfix = parse_query_to_postfix(query)
-        result = evaluate_postfix(postfix, inverted_index, total_docs)
+        result = evaluate_postfix(postfix, inverted_index, all_docs)
         
         if result:
             print(f"✅ Найдено в документах: {sorted(list(result))}")
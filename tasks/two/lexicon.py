@@ -0,0 +1,60 @@
+import os
+import re
+import json
+from collections import defaultdict, Counter
+
+from nltk.stem import WordNetLemmatizer
+
+lemmatizer = WordNetLemmatizer()
+
+
+def build_lexicon(lemmas_dir="data/lemmas", output_file="data/lexicon.json"):
+    """Собирает из data/lemmas/*.json обратный словарь словоформа -> лемма.
+
+    Одна словоформа в разных документах может получить разные леммы
+    (зависит от части речи), выбираем самую частую по числу документов."""
+    votes = defaultdict(Counter)
+    for filename in os.listdir(lemmas_dir):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(lemmas_dir, filename), "r", encoding="utf-8") as f:
+            lemmas = json.load(f)
+        for lemma, forms in lemmas.items():
+            for form in forms:
+                votes[form][lemma] += 1
+
+    lexicon = {
+        form: min(counter.items(), key=lambda item: (-item[1], item[0]))[0]
+        for form, counter in sorted(votes.items())
+    }
+    # Без отступов: файл читается при каждом старте поиска
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Создан файл {output_file} ({len(lexicon)} словоформ)")
+    return lexicon
+
+
+class Lexicon:
+    """Нормализация запроса через готовый словарь вместо pos_tag на каждый запрос."""
+
+    def __init__(self, lexicon_file="data/lexicon.json"):
+        self.lexicon_file = lexicon_file
+        self.forms = {}
+        if os.path.exists(self.lexicon_file):
+            with open(self.lexicon_file, "r", encoding="utf-8") as f:
+                self.forms = json.load(f)
+        else:
+            print(f"Словарь {self.lexicon_file} не найден, запрос будет лемматизироваться без него.")
+
+    def lemmatize(self, word):
+        word = word.lower()
+        lemma = self.forms.get(word)
+        if lemma is None:
+            # Слова нет в корпусе - лемматизируем как существительное
+            lemma = lemmatizer.lemmatize(word)
+        return lemma
+
+    def normalize(self, query):
+        """Превращает строку запроса в список лемм."""
+        words = re.findall(r'\b[a-zA-Z]+\b', query)
+        return [self.lemmatize(w) for w in words]
@@ -1,5 +1,6 @@
 import json
 import os
+import hashlib
 from pathlib import Path
 import re
 from collections import defaultdict
@@ -8,6 +9,8 @@ from bs4 import BeautifulSoup
 from nltk.corpus import wordnet
 import nltk
 
+from tasks.two.lexicon import build_lexicon
+from tasks.two.text_store import TextStore
 
 
 # Скачиваем необходимые словари и модели NLTK (при первом запуске)
@@ -18,6 +21,49 @@ nltk.download('omw-1.4', quiet=True)
 lemmatizer = nltk.WordNetLemmatizer()
 
 
+def _code_hash():
+    """Хэш кода обработки: после его правки кэш по документам становится недействительным."""
+    digest = hashlib.sha1()
+    for module_file in (__file__, os.path.join(os.path.dirname(__file__), "text_store.py")):
+        with open(module_file, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+CODE_HASH = _code_hash()
+
+
+def list_doc_ids(input_dir, index_file="index.txt"):
+    """Номера документов корпуса. После удаления дубликатов номера идут с пропусками.
+
+    Источник - index.txt (как и для dedup): страница, которой там нет,
+    в корпус не входит, даже если ее файл остался в input_dir."""
+    if not os.path.exists(index_file):
+        return sorted(
+            int(name.split(".")[0])
+            for name in os.listdir(input_dir)
+            if name.endswith(".txt") and name.split(".")[0].isdigit()
+        )
+    doc_ids = set()
+    with open(index_file, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(' ', 1)
+            if len(parts) == 2 and os.path.exists(os.path.join(input_dir, f"{parts[0]}.txt")):
+                doc_ids.add(int(parts[0]))
+    return sorted(doc_ids)
+
+
+def remove_stale_outputs(directory, doc_ids):
+    """Удаляет файлы вида {id}.* для документов, которых больше нет в корпусе."""
+    if not os.path.isdir(directory):
+        return
+    doc_ids = {str(doc_id) for doc_id in doc_ids}
+    for name in os.listdir(directory):
+        prefix = name.split(".")[0]
+        if prefix.isdigit() and prefix not in doc_ids:
+            os.remove(os.path.join(directory, name))
+
+
 class NLPProcessor:
     # Теги частей речи в NLTK, которые мы считаем "мусором" по заданию:
     # IN - предлоги и подчинительные союзы
@@ -30,13 +76,17 @@ class NLPProcessor:
     def __init__(
         self,
         input_dir="pages",
-        output_dir="data"
+        output_dir="data",
+        index_file="index.txt"
     ):
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.index_file = index_file
+
+    WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
 
-    def extract_text(self, i):
-        """Очищает текст i-го файла от разметри и мусора."""
+    def extract_clean_text(self, i):
+        """Возвращает текст i-го файла без разметки и с нормализованными пробелами."""
         filepath = os.path.join(self.input_dir, f"{i}.txt")
         if not os.path.exists(filepath):
             return None
@@ -44,8 +94,7 @@ class NLPProcessor:
             html_content = f.read()
         soup = BeautifulSoup(html_content, 'html.parser')
         text = soup.get_text(separator=' ')
-        words = re.findall(r'\b[a-zA-Z]+\b', text)
-        return [w.lower() for w in words]
+        return re.sub(r'\s+', ' ', text).strip()
 
     @staticmethod
     def get_wordnet_pos(treebank_tag):
@@ -61,36 +110,115 @@ class NLPProcessor:
         else:
             return wordnet.NOUN # По умолчанию считаем существительным
 
-    def process_tokens_and_lemmas(self, words):
-        """Создание токенов и лемм."""
-        tokens = set()
-        lemmas = defaultdict(set)
+    def lemmatize_words(self, words):
+        """Возвращает (номер слова, токен, лемма) для всех слов, кроме "мусорных"."""
         tagged_words = nltk.pos_tag(words)
-        for token, pos_tag in tagged_words:
+        for position, (token, pos_tag) in enumerate(tagged_words):
             if pos_tag in self.STOP_TAGS:
                 continue
-            tokens.add(token)
             wn_pos = self.get_wordnet_pos(pos_tag)
-            lemma = lemmatizer.lemmatize(token, pos=wn_pos)
+            yield position, token, lemmatizer.lemmatize(token, pos=wn_pos)
+
+    def page_key(self, doc_id):
+        """Хэш страницы вместе с кодом обработки: меняется одно - документ пересчитывается."""
+        digest = hashlib.sha1(CODE_HASH.encode("utf-8"))
+        with open(os.path.join(self.input_dir, f"{doc_id}.txt"), "rb") as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def _counts_path(self, doc_id):
+        return Path(self.output_dir) / "counts" / f"{doc_id}.json"
+
+    def _cached_counts(self, doc_id, key):
+        """Сохраненные частоты документа, если они построены по той же версии страницы."""
+        path = self._counts_path(doc_id)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            counts = json.load(f)
+        if counts.get("key") != key:
+            return None
+        outputs = [
+            Path(self.output_dir) / "tokens" / f"{doc_id}.txt",
+            Path(self.output_dir) / "lemmas" / f"{doc_id}.json",
+            Path(self.output_dir) / "text" / f"{doc_id}.txt",
+        ]
+        if not all(output.exists() for output in outputs):
+            return None
+        return counts
+
+    def process_document(self, doc_id, key=None):
+        """Полная обработка одной страницы (единственное место, где вызывается pos_tag).
+
+        Пишет токены, леммы, текст для сниппетов и частоты токенов/лемм
+        (data/counts), которые переиспользуют индекс и TF-IDF."""
+        key = key or self.page_key(doc_id)
+        text = self.extract_clean_text(doc_id)
+        if text is None:
+            return None
+        matches = list(self.WORD_RE.finditer(text))
+        words = [m.group().lower() for m in matches]
+
+        tokens = set()
+        lemmas = defaultdict(set)
+        positions = defaultdict(list)  # лемма -> номера слов (для сниппетов)
+        token_counts = defaultdict(int)
+        lemma_counts = defaultdict(int)
+        for position, token, lemma in self.lemmatize_words(words):
+            tokens.add(token)
             lemmas[lemma].add(token)
-        return tokens, lemmas
+            positions[lemma].append(position)
+            token_counts[token] += 1
+            lemma_counts[lemma] += 1
+
+        # Очищенный текст и позиции слов, чтобы поиск не разбирал HTML заново
+        text_store = TextStore(text_dir=str(Path(self.output_dir) / "text"))
+        text_store.write_document(doc_id, text, [m.span() for m in matches], positions)
+
+        path = Path(self.output_dir) / "tokens"
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / f"{doc_id}.txt", "w", encoding="utf-8") as file:
+            file.write('\n'.join(tokens))
+        path = Path(self.output_dir) / "lemmas"
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / f"{doc_id}.json", "w", encoding="utf-8") as file:
+            # json не может set сохранить, поэтому в list
+            json.dump({k: list(v) for k, v in lemmas.items()}, file, indent=4)
+
+        counts = {"key": key, "tokens": token_counts, "lemmas": lemma_counts}
+        path = Path(self.output_dir) / "counts"
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / f"{doc_id}.json", "w", encoding="utf-8") as file:
+            json.dump(counts, file, ensure_ascii=False, separators=(",", ":"))
+        print(f"Обработана {doc_id}-я страница")
+        return counts
+
+    def load_counts(self, doc_id):
+        """Частоты токенов и лемм документа: из кэша, а если страница изменилась - заново."""
+        key = self.page_key(doc_id)
+        return self._cached_counts(doc_id, key) or self.process_document(doc_id, key)
 
     def process(self):
-        for i in range(len(os.listdir(self.input_dir))):
-            words = self.extract_text(i + 1)
-            tokens, lemmas = self.process_tokens_and_lemmas(words)
-
-            path = Path(self.output_dir) / "tokens"
-            path.mkdir(parents=True, exist_ok=True)
-            with open(path / f"{i + 1}.txt", "w", encoding="utf-8") as file:
-                file.write('\n'.join(tokens))
-            path = Path(self.output_dir) / "lemmas"
-            path.mkdir(parents=True, exist_ok=True)
-            with open(path / f"{i + 1}.json", "w", encoding="utf-8") as file:
-                # json не может set сохранить, поэтому в list
-                json.dump({k: list(v) for k, v in lemmas.items()}, file, indent=4)
-            print(f"Обработана {i + 1}-я страница")
+        doc_ids = list_doc_ids(self.input_dir, self.index_file)
+        # Файлы удаленных (например, как дубликаты) документов иначе попали бы в словарь и поиск
+        for name in ("tokens", "lemmas", "text", "counts"):
+            remove_stale_outputs(Path(self.output_dir) / name, doc_ids)
+
+        # Заново обрабатываются только страницы, которые изменились с прошлого запуска
+        skipped = 0
+        for doc_id in doc_ids:
+            key = self.page_key(doc_id)
+            if self._cached_counts(doc_id, key) is not None:
+                skipped += 1
+                continue
+            self.process_document(doc_id, key)
+        print(f"Без изменений: {skipped} из {len(doc_ids)} страниц")
 
+        # Словарь словоформа -> лемма для быстрой нормализации запросов
+        build_lexicon(
+            lemmas_dir=str(Path(self.output_dir) / "lemmas"),
+            output_file=str(Path(self.output_dir) / "lexicon.json")
+        )
 
 if __name__ == "__main__":
     processor = NLPProcessor(input_dir="pages_1", output_dir="data_1")
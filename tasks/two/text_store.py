@@ -0,0 +1,154 @@
+import os
+import json
+from array import array
+from functools import lru_cache
+
+
+class TextStore:
+    """Хранилище очищенного текста документов для сниппетов.
+
+    Для каждого документа в text_dir лежат четыре файла:
+      {id}.txt          - очищенный текст (UTF-8);
+      {id}.offsets      - массив uint32: пары (начало, конец) каждого слова в байтах;
+      {id}.positions    - массив uint32: номера слов, сгруппированные по леммам;
+      {id}.lemmas.json  - лемма -> [начало, количество] ее группы в {id}.positions.
+    Сниппет строится без повторного разбора HTML: из небольшой таблицы
+    {id}.lemmas.json берутся границы, а позиции лемм запроса, offsets
+    и кусок текста читаются через seek."""
+
+    OFFSET_SIZE = array("I").itemsize
+
+    def __init__(self, text_dir="data/text", window=30, cache_size=256):
+        self.text_dir = text_dir
+        self.window = window  # длина сниппета в словах
+        self._lemma_table = lru_cache(maxsize=cache_size)(self._load_lemma_table)
+
+    def _path(self, doc_id, suffix):
+        return os.path.join(self.text_dir, f"{doc_id}{suffix}")
+
+    def write_document(self, doc_id, text, spans, positions):
+        """Сохраняет текст документа.
+
+        spans - список (начало, конец) слов в символах text,
+        positions - лемма -> список номеров слов (по возрастанию)."""
+        os.makedirs(self.text_dir, exist_ok=True)
+        encoded = text.encode("utf-8")
+
+        # Переводим позиции из символов в байты, чтобы потом читать через seek
+        offsets = array("I")
+        byte_pos = 0
+        char_pos = 0
+        for start, end in spans:
+            byte_pos += len(text[char_pos:start].encode("utf-8"))
+            offsets.append(byte_pos)
+            byte_pos += len(text[start:end].encode("utf-8"))
+            offsets.append(byte_pos)
+            char_pos = end
+
+        with open(self._path(doc_id, ".txt"), "wb") as f:
+            f.write(encoded)
+        with open(self._path(doc_id, ".offsets"), "wb") as f:
+            offsets.tofile(f)
+
+        packed = array("I")
+        table = {}
+        for lemma, lemma_positions in positions.items():
+            table[lemma] = [len(packed), len(lemma_positions)]
+            packed.extend(lemma_positions)
+        with open(self._path(doc_id, ".positions"), "wb") as f:
+            packed.tofile(f)
+        with open(self._path(doc_id, ".lemmas.json"), "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+
+    def _load_lemma_table(self, doc_id):
+        path = self._path(doc_id, ".lemmas.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read_positions(self, doc_id, lemmas):
+        """Номера слов для каждой из lemmas: по одному seek на лемму."""
+        table = self._lemma_table(doc_id)
+        if not table:
+            return {}
+        result = {}
+        with open(self._path(doc_id, ".positions"), "rb") as f:
+            for lemma in lemmas:
+                if lemma not in table:
+                    continue
+                start, count = table[lemma]
+                positions = array("I")
+                f.seek(start * self.OFFSET_SIZE)
+                positions.frombytes(f.read(count * self.OFFSET_SIZE))
+                result[lemma] = positions
+        return result
+
+    def _read_offsets(self, doc_id, first_word, last_word):
+        """Читает (начало, конец) для слов first_word..last_word включительно."""
+        result = array("I")
+        with open(self._path(doc_id, ".offsets"), "rb") as f:
+            f.seek(first_word * 2 * self.OFFSET_SIZE)
+            result.frombytes(f.read((last_word - first_word + 1) * 2 * self.OFFSET_SIZE))
+        return result
+
+    def _best_window(self, matches):
+        """Начало окна из self.window слов с наибольшим числом совпадений.
+
+        matches - отсортированный список (номер слова, лемма)."""
+        best_start, best_score = matches[0][0], (0, 0)
+        right = 0
+        for left in range(len(matches)):
+            while right < len(matches) and matches[right][0] < matches[left][0] + self.window:
+                right += 1
+            in_window = matches[left:right]
+            # сначала число разных лемм запроса, потом общее число совпадений
+            score = (len({lemma for _, lemma in in_window}), len(in_window))
+            if score > best_score:
+                best_start, best_score = matches[left][0], score
+        return best_start
+
+    def snippet(self, doc_id, query_lemmas):
+        """Возвращает {"segments": [[текст, совпадение], ...]} или None.
+
+        Сниппет уже разбит на куски: совпадение=True у слов запроса. Клиенту
+        не нужны позиции в символах (в JS строки считаются в UTF-16,
+        и символы вне BMP сдвигали бы подсветку)."""
+        positions = self._read_positions(doc_id, set(query_lemmas))
+        matches = sorted(
+            (pos, lemma)
+            for lemma, lemma_positions in positions.items()
+            for pos in lemma_positions
+        )
+        if not matches:
+            return None
+
+        # Немного контекста перед первым совпадением
+        start_word = max(self._best_window(matches) - self.window // 5, 0)
+        end_word = start_word + self.window - 1
+        offsets = self._read_offsets(doc_id, start_word, end_word)
+        if not offsets:
+            return None
+        end_word = start_word + len(offsets) // 2 - 1
+
+        begin, end = offsets[0], offsets[-1]
+        with open(self._path(doc_id, ".txt"), "rb") as f:
+            f.seek(begin)
+            raw = f.read(end - begin)
+
+        def decode(start, stop):
+            return raw[start - begin:stop - begin].decode("utf-8", errors="replace")
+
+        segments = []
+        last = begin
+        for pos, _ in matches:
+            if start_word <= pos <= end_word:
+                i = (pos - start_word) * 2
+                if offsets[i] > last:
+                    segments.append([decode(last, offsets[i]), False])
+                segments.append([decode(offsets[i], offsets[i + 1]), True])
+                last = offsets[i + 1]
+        if end > last:
+            segments.append([decode(last, end), False])
+
+        return {"segments": segments}